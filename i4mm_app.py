@@ -1,13 +1,71 @@
+import os
+import json
+from bisect import bisect_right
 import streamlit as st
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
+from io import BytesIO
+from matplotlib.figure import Figure
+from matplotlib.collections import LineCollection, PolyCollection
+from matplotlib.lines import Line2D
 from math import pi
 
 # --- Page setup ---
 st.set_page_config(page_title='I4.0 Maturity Assessment (I4MM)', layout='centered')
 st.title('🏭 Industry 4.0 Maturity Assessment (I4MM) — Prototype')
 
+# --- Maturity levels ---
+# I4RI upper bounds for Levels 1-4; anything at or above the last one is Level 5
+THRESHOLDS = (1.5, 2.5, 3.5, 4.25)
+LEVELS = (
+    'Level 1 — Manual / Basic',
+    'Level 2 — Digital Initiation',
+    'Level 3 — Connected Operations',
+    'Level 4 — Predictive / Smart',
+    'Level 5 — Smart / Autonomous',
+)
+RECS = (
+    ['Run awareness sessions', 'Start digital literacy training', 'Basic housekeeping and data recording'],
+    ['Introduce basic sensors & data logging', 'Standardize processes', 'Start small pilot (single machine)'],
+    ['Integrate machines via IoT', 'Implement simple dashboards', 'Plan MES-lite pilot'],
+    ['Deploy predictive maintenance', 'Start analytics for scheduling', 'Train staff on data interpretation'],
+    ['Move towards digital twin & AI optimization', 'Continuous improvement culture', 'Share learnings across clusters'],
+)
+# Precomputed simulation results for each maturity level
+LEVEL_DATA = (
+    'simulation/precomputed_results/level1_baseline.parquet',
+    'simulation/precomputed_results/level1_baseline.parquet',
+    'simulation/precomputed_results/level3_connected.parquet',
+    'simulation/precomputed_results/level4_predictive.parquet',
+    'simulation/precomputed_results/level4_predictive.parquet',
+)
+
+# KPI radar axes; angles close the polygon by repeating the first one
+KPI_CATEGORIES = ("Throughput (units/hr)", "Efficiency (1/Lead Time)")
+ANGLES_KPI = np.concatenate([np.linspace(0, 2*pi, len(KPI_CATEGORIES), endpoint=False), [0.0]])
+
+# --- Cached data loaders ---
+KPI_COLS = ['throughput_per_hr', 'avg_lead_time_min']
+
+@st.cache_data(show_spinner=False)
+def load_scenario(path: str) -> pd.DataFrame:
+    # only the KPI columns, as float32
+    return pd.read_parquet(path, columns=KPI_COLS).astype('float32')
+
+@st.cache_data(show_spinner=False)
+def load_scenario_full(path: str) -> pd.DataFrame:
+    return pd.read_parquet(path)
+
+@st.cache_data(show_spinner=False)
+def scenario_summary(path: str) -> tuple[float, float]:
+    df = load_scenario(path)
+    return float(df['throughput_per_hr'].mean()), float(df['avg_lead_time_min'].mean())
+
+@st.cache_data(show_spinner=False)
+def load_summary(path: str) -> dict:
+    with open(path) as f:
+        return json.load(f)
+
 st.markdown("""
 This interactive tool lets an SME (or consultant) score five dimensions of Industry 4.0 readiness, 
 set weights, and compute the **I4.0 Readiness Index (I4RI)**.  
@@ -16,6 +74,7 @@ The app also shows a radar chart and gives high-level recommendations.
 
 # --- Dimensions ---
 dims = ['Technology', 'Process Integration', 'People & Skills', 'Data & Analytics', 'Strategy & Governance']
+ANGLES_DIMS = np.concatenate([np.linspace(0, 2*pi, len(dims), endpoint=False), [0.0]])
 
 st.sidebar.header('Input: Scores and Weights')
 st.sidebar.markdown('Scores: 1 (Manual) — 5 (Smart/Autonomous)')
@@ -26,36 +85,24 @@ for d in dims:
     scores[d] = st.sidebar.slider(f'{d} — Score (1–5)', min_value=1, max_value=5, value=2, step=1)
     weights[d] = st.sidebar.slider(f'{d} — Weight (importance)', min_value=0.0, max_value=1.0, value=0.2, step=0.05)
 
-# --- Normalize weights ---
-w_sum = sum(weights.values())
-if w_sum == 0:
-    norm_weights = {d: 1/len(dims) for d in dims}
-else:
-    norm_weights = {d: weights[d]/w_sum for d in dims}
-
 # --- Compute Readiness Index ---
-weighted_sum = sum(norm_weights[d] * scores[d] for d in dims)
-i4ri = weighted_sum
+@st.cache_data(show_spinner=False)
+def _compute_i4ri(scores: tuple, weights: tuple) -> tuple[float, np.ndarray]:
+    # weights are normalized to sum to 1; all-zero weights mean equal weighting
+    s = np.fromiter(scores, dtype=np.float64)
+    w = np.fromiter(weights, dtype=np.float64)
+    w_sum = w.sum()
+    norm_w = w / w_sum if w_sum else np.full(len(w), 1 / len(w))
+    return float((norm_w * s).sum()), norm_w
+
+i4ri, norm_weights = _compute_i4ri(tuple(scores.values()), tuple(weights.values()))
 
 st.header('Results')
 st.metric('I4.0 Readiness Index (I4RI)', f'{i4ri:.2f} / 5.00')
 
 # --- Maturity Levels ---
-if i4ri < 1.5:
-    level = 'Level 1 — Manual / Basic'
-    rec = ['Run awareness sessions', 'Start digital literacy training', 'Basic housekeeping and data recording']
-elif i4ri < 2.5:
-    level = 'Level 2 — Digital Initiation'
-    rec = ['Introduce basic sensors & data logging', 'Standardize processes', 'Start small pilot (single machine)']
-elif i4ri < 3.5:
-    level = 'Level 3 — Connected Operations'
-    rec = ['Integrate machines via IoT', 'Implement simple dashboards', 'Plan MES-lite pilot']
-elif i4ri < 4.25:
-    level = 'Level 4 — Predictive / Smart'
-    rec = ['Deploy predictive maintenance', 'Start analytics for scheduling', 'Train staff on data interpretation']
-else:
-    level = 'Level 5 — Smart / Autonomous'
-    rec = ['Move towards digital twin & AI optimization', 'Continuous improvement culture', 'Share learnings across clusters']
+idx = bisect_right(THRESHOLDS, i4ri)
+level, rec, data_path = LEVELS[idx], RECS[idx], LEVEL_DATA[idx]
 
 st.write('**Maturity Level:**', level)
 st.write('**Top recommendations:**')
@@ -63,147 +110,151 @@ for r in rec:
     st.write('-', r)
 
 # --- Simulation-Based Performance Insights ---
-import os
-
 st.subheader('📊 Simulation-Based Performance Insights')
 
-# Map maturity levels to precomputed simulation CSVs
-level_to_csv = {
-    'Level 1 — Manual / Basic': 'simulation/precomputed_results/level1_baseline.csv',
-    'Level 2 — Digital Initiation': 'simulation/precomputed_results/level1_baseline.csv',
-    'Level 3 — Connected Operations': 'simulation/precomputed_results/level3_connected.csv',
-    'Level 4 — Predictive / Smart': 'simulation/precomputed_results/level4_predictive.csv',
-    'Level 5 — Smart / Autonomous': 'simulation/precomputed_results/level4_predictive.csv'
-}
-
-csv_path = level_to_csv.get(level)
-
-if csv_path and os.path.exists(csv_path):
-    df_sim = pd.read_csv(csv_path)
+if data_path and os.path.exists(data_path):
+    df_sim = load_scenario(data_path)
+    mean_tp, mean_lt = scenario_summary(data_path)
     st.success(f"Simulation results for: **{level}**")
-    st.write(f"**Average Throughput (units/hour):** {df_sim['throughput_per_hr'].mean():.2f}")
-    st.write(f"**Average Lead Time (minutes):** {df_sim['avg_lead_time_min'].mean():.1f}")
+    st.write(f"**Average Throughput (units/hour):** {mean_tp:.2f}")
+    st.write(f"**Average Lead Time (minutes):** {mean_lt:.1f}")
 
     # Show comparison chart
-    st.bar_chart(df_sim[['throughput_per_hr', 'avg_lead_time_min']])
+    st.bar_chart(df_sim[KPI_COLS])
 
     # Show raw data toggle
     with st.expander('See detailed simulation data'):
-        st.dataframe(df_sim.head(10))
+        st.dataframe(load_scenario_full(data_path).head(10))
 else:
     st.info('⚠️ Simulation data not available for this maturity level. Run `simulation_runner.py` to generate it.')
 
-st.markdown("---")
-st.subheader("📈 Scenario Comparison — Baseline vs Connected vs Predictive")
-
-# Paths to all scenario CSVs
-paths = {
-    "Baseline": "simulation/precomputed_results/level1_baseline.csv",
-    "Connected": "simulation/precomputed_results/level3_connected.csv",
-    "Predictive": "simulation/precomputed_results/level4_predictive.csv"
-}
-
-data_summary = []
-for name, p in paths.items():
-    if os.path.exists(p):
-        df = pd.read_csv(p)
-        data_summary.append({
-            "Scenario": name,
-            "Throughput (units/hr)": df["throughput_per_hr"].mean(),
-            "Lead Time (min)": df["avg_lead_time_min"].mean()
-        })
-
-if data_summary:
-    df_sum = pd.DataFrame(data_summary)
-    st.dataframe(df_sum)
-
-    # Plot comparison bars
-    st.bar_chart(df_sum.set_index("Scenario")[["Throughput (units/hr)", "Lead Time (min)"]])
-else:
-    st.info("Comparison data not available. Run all simulations first.")
-
-st.markdown("---")
-st.subheader("💰 Estimated ROI from Industry 4.0 Adoption")
-
-# Simple ROI estimation assumptions
-revenue_per_unit = 10000     # ₹ per unit produced
-op_cost_per_hr = 1500        # ₹ operating cost per hour
-
-if len(data_summary) == 3:
-    base = data_summary[0]
-    best = data_summary[-1]
-    delta_throughput = best["Throughput (units/hr)"] - base["Throughput (units/hr)"]
-    delta_lead = base["Lead Time (min)"] - best["Lead Time (min)"]
-
-    added_revenue = delta_throughput * revenue_per_unit * 8   # per 8-hr shift
-    savings = (delta_lead / 60) * op_cost_per_hr              # time saved cost
-    roi = (added_revenue + savings) / (op_cost_per_hr * 8) * 100  # percent ROI per shift
-
-    st.write(f"**Added Revenue per Shift:** ₹{added_revenue:,.0f}")
-    st.write(f"**Operational Savings:** ₹{savings:,.0f}")
-    st.write(f"**Estimated ROI per Shift:** {roi:.1f}%")
-else:
-    st.info("Run all scenarios for ROI estimation.")
-
-st.markdown("---")
-st.subheader("🕸️ KPI Radar Comparison")
-
-if len(data_summary) == 3:
-    import matplotlib.pyplot as plt
-    from math import pi
-
-    kpi_df = pd.DataFrame(data_summary).set_index("Scenario")
-    # Normalize Lead Time inversely for visual comparison
-    kpi_df["Efficiency (1/Lead Time)"] = 1 / kpi_df["Lead Time (min)"]
-
-    categories = ["Throughput (units/hr)", "Efficiency (1/Lead Time)"]
-    N = len(categories)
-    angles = [n / float(N) * 2 * pi for n in range(N)]
-    angles += angles[:1]
-
-    fig, ax = plt.subplots(figsize=(5,5), subplot_kw=dict(polar=True))
-    for scenario, row in kpi_df.iterrows():
-        values = [row[c] for c in categories]
-        values += values[:1]
-        ax.plot(angles, values, linewidth=2, label=scenario)
-        ax.fill(angles, values, alpha=0.1)
-    ax.set_xticks(angles[:-1])
-    ax.set_xticklabels(categories)
-    ax.legend(loc="upper right")
-    st.pyplot(fig)
-
-
+# Radar charts are cached as rendered PNG bytes rather than Figure objects:
+# nothing mutable is shared between sessions, no Figure stays alive after a
+# cache miss, and the figures are built without pyplot's global registry
+def _to_png(fig: Figure) -> bytes:
+    # same savefig defaults st.pyplot uses
+    buf = BytesIO()
+    fig.savefig(buf, format='png', dpi=200, bbox_inches='tight')
+    return buf.getvalue()
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def build_kpi_radar(scenarios: tuple, values: tuple) -> bytes:
+    # one LineCollection for the outlines and one PolyCollection for the fills
+    colors = [f'C{i}' for i in range(len(scenarios))]
+    segs = [np.column_stack([ANGLES_KPI, np.r_[row, row[0]]]) for row in values]
+    fig = Figure(figsize=(5,5))
+    ax = fig.add_subplot(polar=True)
+    ax.add_collection(PolyCollection(segs, facecolors=colors, edgecolors='none', alpha=0.1))
+    ax.add_collection(LineCollection(segs, colors=colors, linewidths=2))
+    ax.autoscale_view()
+    ax.set_xticks(ANGLES_KPI[:-1])
+    ax.set_xticklabels(KPI_CATEGORIES)
+    ax.legend(handles=[Line2D([], [], color=c, linewidth=2, label=name) for c, name in zip(colors, scenarios)],
+              loc="upper right")
+    return _to_png(fig)
+
+# Scenario comparison, ROI and KPI radar. Sidebar changes still rerun this
+# body with the rest of the script (the caches keep that cheap); the fragment
+# only scopes reruns for widgets added inside this section later
+@st.fragment
+def render_scenarios():
+    st.markdown("---")
+    st.subheader("📈 Scenario Comparison — Baseline vs Connected vs Predictive")
+
+    # Per-scenario means written by simulation_runner.py
+    summary_path = "simulation/precomputed_results/summary.json"
+    scenario_keys = {
+        "Baseline": "level1_baseline",
+        "Connected": "level3_connected",
+        "Predictive": "level4_predictive"
+    }
+
+    data_summary = []
+    if os.path.exists(summary_path):
+        summary = load_summary(summary_path)
+        for name, key in scenario_keys.items():
+            # lead_time is None when no rep of the scenario completed a job
+            if key in summary and summary[key]["lead_time"] is not None:
+                data_summary.append({
+                    "Scenario": name,
+                    "Throughput (units/hr)": summary[key]["throughput"],
+                    "Lead Time (min)": summary[key]["lead_time"]
+                })
+
+    if data_summary:
+        df_sum = pd.DataFrame(data_summary)
+        st.dataframe(df_sum)
+
+        # Plot comparison bars
+        st.bar_chart(df_sum.set_index("Scenario")[["Throughput (units/hr)", "Lead Time (min)"]])
+    else:
+        st.info("Comparison data not available. Run all simulations first.")
+
+    st.markdown("---")
+    st.subheader("💰 Estimated ROI from Industry 4.0 Adoption")
+
+    # Simple ROI estimation assumptions
+    revenue_per_unit = 10000     # ₹ per unit produced
+    op_cost_per_hr = 1500        # ₹ operating cost per hour
+
+    if len(data_summary) == 3:
+        base = data_summary[0]
+        best = data_summary[-1]
+        delta_throughput = best["Throughput (units/hr)"] - base["Throughput (units/hr)"]
+        delta_lead = base["Lead Time (min)"] - best["Lead Time (min)"]
+
+        added_revenue = delta_throughput * revenue_per_unit * 8   # per 8-hr shift
+        savings = (delta_lead / 60) * op_cost_per_hr              # time saved cost
+        roi = (added_revenue + savings) / (op_cost_per_hr * 8) * 100  # percent ROI per shift
+
+        st.write(f"**Added Revenue per Shift:** ₹{added_revenue:,.0f}")
+        st.write(f"**Operational Savings:** ₹{savings:,.0f}")
+        st.write(f"**Estimated ROI per Shift:** {roi:.1f}%")
+    else:
+        st.info("Run all scenarios for ROI estimation.")
+
+    st.markdown("---")
+    st.subheader("🕸️ KPI Radar Comparison")
+
+    if len(data_summary) == 3:
+        kpi_df = pd.DataFrame(data_summary).set_index("Scenario")
+        # Normalize Lead Time inversely for visual comparison
+        kpi_df["Efficiency (1/Lead Time)"] = 1 / kpi_df["Lead Time (min)"]
+
+        png = build_kpi_radar(tuple(kpi_df.index),
+                              tuple(map(tuple, kpi_df[list(KPI_CATEGORIES)].itertuples(index=False))))
+        st.image(png, width='stretch')
+
+render_scenarios()
 
 # --- Data Table ---
 df = pd.DataFrame({
     'Dimension': dims,
     'Score (1-5)': [scores[d] for d in dims],
-    'Weight (normalized)': [norm_weights[d] for d in dims]
+    'Weight (normalized)': norm_weights
 })
 st.subheader('Dimension Scores & Weights')
 st.dataframe(df.style.format({'Weight (normalized)': '{:.2f}', 'Score (1-5)': '{:.0f}'}))
 
 # --- Radar Chart ---
-def make_radar_chart(categories, values, title='Radar: I4.0 Dimensions'):
-    N = len(categories)
-    angles = [n / float(N) * 2 * pi for n in range(N)]
-    angles += angles[:1]
-    vals = values + values[:1]
-    fig, ax = plt.subplots(figsize=(6,6), subplot_kw=dict(polar=True))
+@st.cache_data(show_spinner=False, max_entries=64)
+def build_radar(values: tuple, i4ri: float) -> bytes:
+    vals = np.r_[values, values[0]]
+    fig = Figure(figsize=(6,6))
+    ax = fig.add_subplot(polar=True)
     ax.set_theta_offset(pi / 2)
     ax.set_theta_direction(-1)
     ax.set_rlabel_position(0)
     ax.set_ylim(0,5)
-    ax.plot(angles, vals, linewidth=2)
-    ax.fill(angles, vals, alpha=0.25)
-    ax.set_xticks(angles[:-1])
-    ax.set_xticklabels(categories)
-    ax.set_title(title)
-    return fig
-
-values = [scores[d] for d in dims]
-fig = make_radar_chart(dims, values, title=f'I4.0 Dimension Scores — I4RI={i4ri:.2f}')
-st.pyplot(fig)
+    ax.plot(ANGLES_DIMS, vals, linewidth=2)
+    ax.fill(ANGLES_DIMS, vals, alpha=0.25)
+    ax.set_xticks(ANGLES_DIMS[:-1])
+    ax.set_xticklabels(dims)
+    ax.set_title(f'I4.0 Dimension Scores — I4RI={i4ri:.2f}')
+    return _to_png(fig)
+
+values = tuple(scores[d] for d in dims)
+st.image(build_radar(values, round(i4ri, 2)), width='stretch')
 
 st.markdown('---')
 st.markdown('**Note:** This is a prototype tool. For real assessments, validate scores with shop-floor data or expert consultation.')
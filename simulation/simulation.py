@@ -1,32 +1,41 @@
 # simulation/simulation.py
 import simpy
-import random
 import statistics
+from simulation.streams import run_streams, process_time_buffers
 
 class Machine:
-    def __init__(self, env, name, mttf, mttr):
+    def __init__(self, env, name, mttf, mttr, ttf_rng, ttr_rng):
         self.env = env
         self.name = name
         self.mttf = mttf
         self.mttr = mttr
+        self.ttf_rng = ttf_rng
+        self.ttr_rng = ttr_rng
         self.resource = simpy.Resource(env, capacity=1)
         self.busy_time = 0.0
         self.downtime = 0.0
         self.next_failure_time = None
         self.failed = False
+        self.repaired_event = env.event()
+        self.current_job = None
         self.schedule_next_failure()
 
     def schedule_next_failure(self):
-        ttf = random.expovariate(1.0 / self.mttf)
+        ttf = self.ttf_rng.exponential(self.mttf)
         self.next_failure_time = self.env.now + max(0.0001, ttf)
 
     def fail_and_repair(self):
         self.failed = True
         down_start = self.env.now
-        repair_time = random.expovariate(1.0 / self.mttr)
+        if self.current_job is not None:
+            # pause the job being processed until the repair is done
+            self.current_job.interrupt()
+        repair_time = self.ttr_rng.exponential(self.mttr)
         yield self.env.timeout(repair_time)
         self.failed = False
         self.downtime += self.env.now - down_start
+        self.repaired_event.succeed()
+        self.repaired_event = self.env.event()
         self.schedule_next_failure()
 
 def machine_failure_monitor(env, machine):
@@ -39,52 +48,54 @@ def machine_failure_monitor(env, machine):
 def job_process(env, job_id, machines, process_times, stats):
     arrival = env.now
     for i, machine in enumerate(machines):
-        proc_time = max(0.01, process_times[i]())
+        proc_time = max(0.01, process_times[i][job_id % len(process_times[i])])
         with machine.resource.request() as req:
             yield req
+            if machine.failed:
+                # wait until machine repaired
+                yield machine.repaired_event
+            machine.current_job = env.active_process
             remaining = proc_time
             while remaining > 1e-6:
-                if machine.failed:
-                    # wait until machine repaired
-                    yield env.timeout(0.1)
-                    continue
-                t_until_fail = machine.next_failure_time - env.now
-                if t_until_fail <= 0:
-                    # allow failure monitor to handle immediate failure
-                    yield env.timeout(0.0)
-                    continue
-                step = min(remaining, t_until_fail)
-                yield env.timeout(step)
-                remaining -= step
+                start = env.now
+                try:
+                    yield env.timeout(remaining)
+                    remaining = 0.0
+                except simpy.Interrupt:
+                    # machine failed mid-job: resume the rest after repair
+                    remaining -= env.now - start
+                    yield machine.repaired_event
+            machine.current_job = None
             machine.busy_time += proc_time
     stats['completed_times'].append(env.now - arrival)
     stats['completion_times'].append(env.now)
 
-def job_generator(env, arrival_rate, machines, process_times, sim_time, stats):
+def job_generator(env, arrival_rate, machines, process_times, sim_time, stats, rng):
     job_id = 0
     while env.now < sim_time:
-        inter = random.expovariate(arrival_rate)
+        inter = rng.exponential(1.0 / arrival_rate)
         yield env.timeout(inter)
         job_id += 1
         env.process(job_process(env, job_id, machines, process_times, stats))
         stats['generated'] += 1
 
 def run_simulation_once(params, sim_time_minutes=8*60, seed=None):
-    if seed is not None:
-        random.seed(seed)
+    streams = run_streams(params, seed)
     env = simpy.Environment()
     machine_names = ['M1 (CNC)', 'M2 (Finish)', 'Assembly']
     machines = []
     for i, name in enumerate(machine_names):
-        mac = Machine(env, name, params['mttf'][i], params['mttr'][i])
+        mac = Machine(env, name, params['mttf'][i], params['mttr'][i],
+                      streams['ttf'][i], streams['ttr'][i])
         machines.append(mac)
         env.process(machine_failure_monitor(env, mac))
 
-    process_times = params['process_times']
+    process_times = process_time_buffers(streams, params, sim_time_minutes)
     arrival_rate = params['arrival_rate']
 
     stats = {'generated':0, 'completed_times':[], 'completion_times':[]}
-    env.process(job_generator(env, arrival_rate, machines, process_times, sim_time_minutes, stats))
+    env.process(job_generator(env, arrival_rate, machines, process_times, sim_time_minutes, stats,
+                              streams['arrivals']))
     env.run(until=sim_time_minutes)
 
     # KPIs
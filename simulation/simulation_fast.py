@@ -0,0 +1,96 @@
+# simulation/simulation_fast.py
+# Vectorized NumPy version of the 3-stage line in simulation.py.
+#
+# Every station is a single FIFO server whose failure/repair cycle runs
+# on its own clock. A job that hits a failure pauses and then resumes
+# its remaining work after the repair. So in "up-time" (wall time minus
+# downtime) each station is a plain queue, and the Lindley recursion
+#   F[j] = max(F[j-1], ready[j]) + p[j]
+# has a closed form: F = S + maximum.accumulate(ready - S_prev).
+# Wall-clock/up-time conversions use searchsorted on the failure schedule.
+import numpy as np
+from simulation.streams import run_streams, process_time_buffers
+
+def _failure_schedule(ttf_rng, ttr_rng, mttf, mttr, sim_time):
+    """Start times and lengths of the up periods, plus the down intervals."""
+    n = int(3 * sim_time / mttf) + 10
+    ttf = np.maximum(0.0001, ttf_rng.exponential(mttf, n))
+    ttr = ttr_rng.exponential(mttr, n)
+    up_start = np.r_[0.0, np.cumsum(ttf + ttr)[:-1]]
+    up_len = ttf.copy()
+    up_len[-1] = np.inf  # machine never fails again past the sampled horizon
+    down_start = up_start[:-1] + ttf[:-1]
+    down_end = up_start[1:]
+    return up_start, up_len, down_start, down_end
+
+def _to_uptime(t, up_start, up_len, up_before):
+    i = np.searchsorted(up_start, t, side='right') - 1
+    return up_before[i] + np.minimum(t - up_start[i], up_len[i])
+
+def _to_walltime(u, up_start, up_before):
+    i = np.searchsorted(up_before, u, side='right') - 1
+    return up_start[i] + (u - up_before[i])
+
+def _station_finish(ready, p, up_start, up_len, up_before):
+    # FIFO single server, solved in the station's up-time
+    s = np.cumsum(p)
+    s_prev = np.r_[0.0, s[:-1]]
+    finish_u = s + np.maximum.accumulate(_to_uptime(ready, up_start, up_len, up_before) - s_prev)
+    return _to_walltime(finish_u, up_start, up_before)
+
+def _arrivals(rng, arrival_rate, sim_time):
+    n = max(10, int(sim_time * arrival_rate * 3))
+    arrivals = np.cumsum(rng.exponential(1.0 / arrival_rate, n))
+    while arrivals[-1] < sim_time:
+        more = arrivals[-1] + np.cumsum(rng.exponential(1.0 / arrival_rate, n))
+        arrivals = np.r_[arrivals, more]
+    return arrivals[arrivals < sim_time]
+
+def run_simulation_once(params, sim_time_minutes=8*60, seed=None):
+    streams = run_streams(params, seed)
+    process_times = process_time_buffers(streams, params, sim_time_minutes)
+    machine_names = ['M1 (CNC)', 'M2 (Finish)', 'Assembly']
+
+    arrivals = _arrivals(streams['arrivals'], params['arrival_rate'], sim_time_minutes)
+    n = len(arrivals)
+
+    ready = arrivals
+    machine_busy = np.zeros(len(machine_names))
+    machine_down = np.zeros(len(machine_names))
+    for k in range(len(machine_names)):
+        # job j uses the same pre-sampled process time as in the SimPy model
+        buf = process_times[k]
+        p = np.maximum(0.01, buf[np.arange(1, n+1) % len(buf)])
+        up_start, up_len, down_start, down_end = _failure_schedule(
+            streams['ttf'][k], streams['ttr'][k], params['mttf'][k], params['mttr'][k], sim_time_minutes)
+        up_before = np.r_[0.0, np.cumsum(up_len)[:-1]]
+
+        finish = _station_finish(ready, p, up_start, up_len, up_before)
+
+        # busy time counts jobs that finished this stage within the horizon
+        machine_busy[k] = p[finish <= sim_time_minutes].sum()
+        machine_down[k] = (np.minimum(down_end, sim_time_minutes)
+                           - np.minimum(down_start, sim_time_minutes)).sum()
+        ready = finish
+
+    util = machine_busy / sim_time_minutes
+    down_frac = machine_down / sim_time_minutes
+    machine_stats = [{
+        'name': name,
+        'busy_time': float(machine_busy[k]),
+        'downtime': float(machine_down[k]),
+        'utilization': float(util[k]),
+        'down_frac': float(down_frac[k])
+    } for k, name in enumerate(machine_names)]
+
+    done = ready <= sim_time_minutes
+    completed = int(done.sum())
+    throughput_per_hr = completed / (sim_time_minutes/60.0)
+    avg_lead_time_min = float((ready[done] - arrivals[done]).mean()) if completed else None
+    return {
+        'throughput_per_hr': throughput_per_hr,
+        'avg_lead_time_min': avg_lead_time_min,
+        'generated': n,
+        'completed': completed,
+        'machine_stats': machine_stats
+    }